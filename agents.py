@@ -1,9 +1,10 @@
 from crewai import Agent, LLM
 from tools import (
     get_jira_bugs, get_jira_issue_details, get_linked_jira_issues,
-    analyze_entire_codebase, analyze_bug_with_gemini, generate_bug_solution,
+    analyze_entire_codebase, analyze_local_codebase, analyze_bug_with_gemini, generate_bug_solution,
     generate_comprehensive_report, add_jira_comment
 )
+from routing import TIER_MODELS
 import os
 import yaml
 
@@ -13,7 +14,7 @@ class BugAnalysisAgents:
         if gemini_key:
             os.environ['GOOGLE_API_KEY'] = gemini_key
             self.llm = LLM(
-                model="gemini/gemini-1.5-flash",
+                model=f"gemini/{TIER_MODELS['standard']}",
                 api_key=gemini_key
             )
         else:
@@ -40,7 +41,7 @@ class BugAnalysisAgents:
             role=config['role'],
             goal=config['goal'],
             backstory=config['backstory'],
-            tools=[get_linked_jira_issues, analyze_entire_codebase],
+            tools=[get_linked_jira_issues, analyze_entire_codebase, analyze_local_codebase],
             llm=self.llm,
             verbose=True
         )
@@ -0,0 +1,82 @@
+import os
+import json
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+RUNS_DIR = os.getenv('BUG_RUNS_DIR', 'runs')
+MANIFEST_FILE = 'manifest.json'
+
+class RunCheckpoint:
+    """Run directory holding completed task outputs and the per-bug record store.
+
+    Layout:
+        runs/<run_id>/manifest.json     completed task names, in order
+        runs/<run_id>/tasks/<name>.md   each completed task's final output
+        runs/<run_id>/records/*.jsonl   per-bug stage records (see records.py)
+        runs/<run_id>/routing_stats.json  per-tier model latency and cost (see routing.py)
+    """
+
+    def __init__(self, run_dir: str):
+        self.run_dir = run_dir
+        self.tasks_dir = os.path.join(run_dir, 'tasks')
+        self.records_dir = os.path.join(run_dir, 'records')
+        self._lock = threading.Lock()
+        os.makedirs(self.tasks_dir, exist_ok=True)
+        os.makedirs(self.records_dir, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+    @classmethod
+    def create(cls) -> "RunCheckpoint":
+        run_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        return cls(os.path.join(RUNS_DIR, run_id))
+
+    @classmethod
+    def latest(cls) -> Optional["RunCheckpoint"]:
+        """Most recent run directory, or None if there is nothing to resume"""
+        if not os.path.isdir(RUNS_DIR):
+            return None
+        run_ids = sorted(d for d in os.listdir(RUNS_DIR) if os.path.isdir(os.path.join(RUNS_DIR, d)))
+        return cls(os.path.join(RUNS_DIR, run_ids[-1])) if run_ids else None
+
+    def _manifest_path(self) -> str:
+        return os.path.join(self.run_dir, MANIFEST_FILE)
+
+    def _load_manifest(self) -> dict:
+        path = self._manifest_path()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'completed_tasks': [], 'updated': None}
+
+    def _task_path(self, name: str) -> str:
+        return os.path.join(self.tasks_dir, f"{name}.md")
+
+    def save_task_output(self, name: str, output: str):
+        """Persist a finished task's output, then mark it complete (write-then-rename so a crash never half-marks)"""
+        with self._lock:
+            with open(self._task_path(name), 'w', encoding='utf-8') as f:
+                f.write(output)
+            if name not in self.manifest['completed_tasks']:
+                self.manifest['completed_tasks'].append(name)
+            self.manifest['updated'] = datetime.now().isoformat()
+            tmp_path = self._manifest_path() + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self._manifest_path())
+
+    def is_complete(self, name: str) -> bool:
+        return name in self.manifest['completed_tasks'] and os.path.exists(self._task_path(name))
+
+    def task_output(self, name: str) -> Optional[str]:
+        if not self.is_complete(name):
+            return None
+        with open(self._task_path(name), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def first_incomplete(self, names: List[str]) -> int:
+        """Index of the first task still to run; len(names) if all are done"""
+        for i, name in enumerate(names):
+            if not self.is_complete(name):
+                return i
+        return len(names)
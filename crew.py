@@ -1,33 +1,90 @@
 from crewai import Crew, Process
 from agents import BugAnalysisAgents
 from tasks import BugAnalysisTasks
+from routing import RoutingStats, stats_scope, ROUTING_STATS_FILE
+from records import set_records_dir
+from checkpoint import RunCheckpoint
+from scheduler import exhaustion_scope
 import os
 
 class BugAnalysisCrew:
     def __init__(self):
         self.agents = BugAnalysisAgents()
         self.tasks = BugAnalysisTasks()
+        self.checkpoint = None
+        self.routing_stats = RoutingStats()
     
-    def run(self):
-        # Initialize agents
-        bug_collector = self.agents.bug_collector()
-        context_enricher = self.agents.context_enricher()
-        analysis_agent = self.agents.analysis_agent()
-        reporting_agent = self.agents.reporting_agent()
+    def run(self, resume=False):
+        # Resume continues the latest run directory; otherwise start a fresh one
+        self.checkpoint = (RunCheckpoint.latest() if resume else None) or RunCheckpoint.create()
+        set_records_dir(self.checkpoint.records_dir)
         
-        # Create tasks
-        collect_task = self.tasks.collect_bugs_task(bug_collector)
-        enrich_task = self.tasks.enrich_context_task(context_enricher)
-        analyze_task = self.tasks.analyze_solution_task(analysis_agent)
-        report_task = self.tasks.report_results_task(reporting_agent)
+        # Per-tier model latency/cost is kept with the run, so a resumed run keeps adding to it
+        stats_path = os.path.join(self.checkpoint.run_dir, ROUTING_STATS_FILE)
+        self.routing_stats = RoutingStats.load(stats_path)
+        
+        # Stage name, agent factory and task factory, in execution order
+        stages = [
+            ("collect", self.agents.bug_collector, self.tasks.collect_bugs_task),
+            ("enrich", self.agents.context_enricher, self.tasks.enrich_context_task),
+            ("analyze", self.agents.analysis_agent, self.tasks.analyze_solution_task),
+            ("report", self.agents.reporting_agent, self.tasks.report_results_task),
+        ]
+        names = [name for name, _, _ in stages]
+        start = self.checkpoint.first_incomplete(names)
+        
+        # Quota exhaustion reported by any scheduled call in this run, including ones CrewAI swallowed
+        quota_errors = []
+        agents = []
+        tasks = []
+        for i, (name, agent_factory, task_factory) in enumerate(stages):
+            agent = agent_factory()
+            task = task_factory(agent, callback=lambda output, name=name: self._complete_stage(name, output, quota_errors))
+            if i < start:
+                self._restore_output_file(name, task)
+                continue
+            agents.append(agent)
+            tasks.append(task)
+        
+        if start == len(stages):
+            # Nothing left to run; the completed stages' output files were restored above
+            return self.checkpoint.task_output(names[-1])
+        
+        if start > 0:
+            # Skipped stages still feed the first remaining one through their saved output
+            tasks[0].description += (
+                f"\n\nRESUMED RUN: the previous stage already completed. Its output was:\n\n"
+                f"{self.checkpoint.task_output(names[start - 1])}"
+            )
         
         # Create crew with sequential process and enhanced verbosity
         crew = Crew(
-            agents=[bug_collector, context_enricher, analysis_agent, reporting_agent],
-            tasks=[collect_task, enrich_task, analyze_task, report_task],
+            agents=agents,
+            tasks=tasks,
             process=Process.sequential,
             verbose=True,  # Enable verbose output
             memory=False  # Disable memory for now
         )
         
-        return crew.kickoff()
\ No newline at end of file
+        try:
+            with stats_scope(self.routing_stats), exhaustion_scope(quota_errors):
+                result = crew.kickoff()
+        finally:
+            self.routing_stats.record_agent_usage(getattr(crew, 'usage_metrics', None))
+            self.routing_stats.save(stats_path)
+        if quota_errors:
+            raise quota_errors[0]
+        return result
+    
+    def _complete_stage(self, name, output, quota_errors):
+        """Checkpoint a finished stage, or stop the run if a service ran out of quota during it"""
+        if quota_errors:
+            # The stage finished on degraded tool output; leave it incomplete so Resume reruns it
+            raise quota_errors[0]
+        self.checkpoint.save_task_output(name, str(output))
+    
+    def _restore_output_file(self, name, task):
+        """Put a skipped stage's saved output back where the dashboard reads it"""
+        if task.output_file and not os.path.exists(task.output_file):
+            with open(task.output_file, 'w', encoding='utf-8') as f:
+                f.write(self.checkpoint.task_output(name))
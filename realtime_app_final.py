@@ -1,13 +1,24 @@
 import panel as pn
 import threading
 import time
+import io
 import os
+import pandas as pd
 from dotenv import load_dotenv
 from crew import BugAnalysisCrew
+from records import load_latest_records, get_record, set_records_dir, records_dir_scope, store_version
+from checkpoint import RunCheckpoint
+from webhook import get_listener, WEBHOOK_RECORDS_DIR
+from scheduler import priority_scope, PRIORITY_INTERACTIVE, QuotaExhaustedError
+from reporting import REPORT_FILE
 
 load_dotenv()
 pn.extension('tabulator')
 
+PRIORITY_ORDER = ["Highest", "High", "Medium", "Low", "Lowest"]
+BUG_GRID_COLUMNS = ["Key", "Summary", "Priority", "Status", "Tier", "Analysis"]
+BUG_GRID_LIST_FILTERS = ["Priority", "Status", "Tier"]
+
 class RealTimeBugAnalysisApp:
     def __init__(self):
         self.crew = BugAnalysisCrew()
@@ -18,6 +29,14 @@ class RealTimeBugAnalysisApp:
             "Strategic Reporting Specialist": "strategic_reporting_output.txt"
         }
         self.agent_displays = {}
+        self.bug_grid = None
+        self._bug_grid_version = None
+        
+        # Show the most recent run's records until a new run starts
+        latest_run = RunCheckpoint.latest()
+        if latest_run:
+            set_records_dir(latest_run.records_dir)
+        self.routing_display = None
         self.is_running = False
     
     def read_agent_output(self, filename):
@@ -145,6 +164,108 @@ class RealTimeBugAnalysisApp:
         
         return content
     
+    def load_bug_records(self):
+        """Current run's records, overlaid with webhook-triggered analyses of newer issue versions"""
+        records = load_latest_records()
+        with records_dir_scope(WEBHOOK_RECORDS_DIR):
+            pushed = load_latest_records()
+        for key, record in pushed.items():
+            if key not in records or record.updated >= records[key].updated:
+                records[key] = record
+        return records
+    
+    def build_bug_rows(self):
+        """Build one grid row per bug from the pipeline's structured records"""
+        rows = [{
+            "Key": record.key,
+            "Summary": record.summary,
+            "Priority": record.priority,
+            "Status": record.status,
+            "Tier": record.tier,
+            "Analysis": record.analysis.strip().splitlines()[0][:120] if record.analysis.strip() else "Pending"
+        } for record in self.load_bug_records().values()]
+        
+        df = pd.DataFrame(rows, columns=BUG_GRID_COLUMNS)
+        # Ordered categorical so sorting follows Jira severity rather than the alphabet
+        extra = sorted(set(df["Priority"]) - set(PRIORITY_ORDER))
+        df["Priority"] = pd.Categorical(df["Priority"], categories=PRIORITY_ORDER + extra, ordered=True)
+        return df
+    
+    def build_bug_filters(self, df):
+        """Header filters for the grid, with list choices taken from the full DataFrame.
+        
+        Tabulator's valuesLookup only sees the rows on the current page under remote
+        pagination, so the list filters get explicit values instead.
+        """
+        filters = {
+            "Key": {'type': 'input', 'func': 'like', 'placeholder': 'Filter key'},
+            "Summary": {'type': 'input', 'func': 'like', 'placeholder': 'Filter summary'},
+            "Analysis": {'type': 'input', 'func': 'like', 'placeholder': 'Filter analysis'}
+        }
+        for column in BUG_GRID_LIST_FILTERS:
+            present = set(df[column])
+            if isinstance(df[column].dtype, pd.CategoricalDtype):
+                values = [value for value in df[column].cat.categories if value in present]
+            else:
+                values = sorted(present)
+            filters[column] = {'type': 'list', 'func': 'in', 'values': values, 'multiselect': True}
+        return filters
+    
+    def render_bug_details(self, row):
+        """Load and format a bug's context, analysis and solution when its row is expanded"""
+        record = get_record(row["Key"])
+        with records_dir_scope(WEBHOOK_RECORDS_DIR):
+            pushed = get_record(row["Key"])
+        if pushed is not None and (record is None or pushed.updated >= record.updated):
+            record = pushed
+        if record is None:
+            return pn.pane.Markdown("*Record not available*")
+        
+        parts = [f"## {record.key}: {record.summary}"]
+        parts.append("### 🔗 Context")
+        if record.linked_issues:
+            parts.append(f"**Linked issues:** {', '.join(record.linked_issues)}")
+        if record.matched_files:
+            parts.append(f"**Matched files:** {', '.join(f'`{name}`' for name in record.matched_files)}")
+        if record.context:
+            parts.append(f"**Code hits:** {record.context}")
+        if record.description:
+            parts.append(record.description)
+        parts.append("### 🤖 Analysis")
+        parts.append(self.format_code_forensics_content(record.analysis) if record.analysis else "*Not available yet*")
+        parts.append("### 🛠️ Solution")
+        parts.append(self.format_code_forensics_content(record.solution) if record.solution else "*Not available yet*")
+        
+        return pn.pane.Markdown("\n\n".join(parts), sizing_mode='stretch_width')
+    
+    def read_handbook(self):
+        """Per-bug resolution handbook written by generate_comprehensive_report, for download"""
+        if not os.path.exists(REPORT_FILE):
+            return io.BytesIO("The handbook has not been generated yet; run the analysis first.\n".encode('utf-8'))
+        with open(REPORT_FILE, 'rb') as f:
+            return io.BytesIO(f.read())
+    
+    def bug_records_version(self):
+        """Change marker for both record stores the grid is built from"""
+        with records_dir_scope(WEBHOOK_RECORDS_DIR):
+            pushed = store_version()
+        return store_version(), pushed
+    
+    def refresh_bug_grid(self):
+        """Reload grid rows and filter choices from the structured records, if any store changed"""
+        if self.bug_grid is None:
+            return
+        version = self.bug_records_version()
+        if version == self._bug_grid_version:
+            return
+        self._bug_grid_version = version
+        df = self.build_bug_rows()
+        self.bug_grid.value = df
+        # Re-sending header filters resets the user's filter inputs, so only do it when the choices change
+        filters = self.build_bug_filters(df)
+        if filters != self.bug_grid.header_filters:
+            self.bug_grid.header_filters = filters
+    
     def update_agent_display(self, agent_name, content=None, status="⏳ Waiting"):
         """Update the display for a specific agent"""
         if agent_name == "Bug Intelligence Specialist":
@@ -212,6 +333,9 @@ Waiting for analysis results...
                     else:
                         self.update_agent_display(agent_name, status="⏳ Processing...")
             
+            # Records are appended per bug as tools finish, so the grid fills in progressively
+            self.refresh_bug_grid()
+            
             # Update status
             if len(completed_agents) == len(self.agent_files):
                 status_text.object = "✅ All agents completed successfully!"
@@ -226,16 +350,16 @@ Waiting for analysis results...
             if agent_name not in completed_agents:
                 self.update_agent_display(agent_name, "No output generated or analysis incomplete", "⚠️ Incomplete")
     
-    def run_analysis(self, status_text):
-        """Run the CrewAI analysis"""
+    def run_analysis(self, status_text, resume=False):
+        """Run the CrewAI analysis, optionally resuming the last interrupted run"""
         if self.is_running:
             return
         
         self.is_running = True
-        status_text.object = "🔄 Starting CrewAI analysis..."
+        status_text.object = "🔄 Resuming last CrewAI run..." if resume else "🔄 Starting CrewAI analysis..."
         
         try:
-            # Clear any existing output files
+            # Clear any existing output files (a resumed run restores its completed stages)
             for filename in self.agent_files.values():
                 if os.path.exists(filename):
                     os.remove(filename)
@@ -244,13 +368,20 @@ Waiting for analysis results...
             monitor_thread = threading.Thread(target=self.monitor_output_files, args=(status_text,), daemon=True)
             monitor_thread.start()
             
-            # Run CrewAI analysis
-            result = self.crew.run()
+            # Run CrewAI analysis; dashboard-triggered calls go ahead of background work
+            with priority_scope(PRIORITY_INTERACTIVE):
+                result = self.crew.run(resume=resume)
             print("CrewAI analysis completed")
             
             # Wait for monitoring to complete
             monitor_thread.join(timeout=10)
+            self.routing_display.object = self.crew.routing_stats.to_markdown()
             
+        except QuotaExhaustedError as e:
+            status_text.object = f"❌ {e.service} quota exhausted — run stopped. Use Resume Last Run once the quota recovers."
+            self.routing_display.object = self.crew.routing_stats.to_markdown()
+            for agent_name in self.agent_files.keys():
+                self.update_agent_display(agent_name, f"Run stopped: {str(e)}", "❌ Error")
         except Exception as e:
             status_text.object = f"❌ Error: {str(e)}"
             for agent_name in self.agent_files.keys():
@@ -269,6 +400,13 @@ Waiting for analysis results...
             height=50
         )
         
+        resume_button = pn.widgets.Button(
+            name="↻ Resume Last Run",
+            button_type="default",
+            width=200,
+            height=40
+        )
+        
         status_text = pn.pane.Markdown(
             "**Ready to analyze bugs...** Click the button to start.",
             width=400
@@ -284,19 +422,48 @@ Waiting for analysis results...
             )
             self.update_agent_display(agent_name)
         
-        def start_analysis(event):
+        self.routing_display = pn.pane.Markdown("*No run yet*", width=400)
+        
+        # The strategic report only carries the executive summary; per-bug sections live in the handbook
+        handbook_download = pn.widgets.FileDownload(
+            callback=self.read_handbook,
+            filename=os.path.basename(REPORT_FILE),
+            label="📥 Download full bug resolution handbook",
+            button_type="primary"
+        )
+        
+        # Per-bug grid: pagination, filtering and sorting run server-side so only
+        # the visible page is sent, and row details are rendered on expand only
+        self._bug_grid_version = self.bug_records_version()
+        bug_rows = self.build_bug_rows()
+        self.bug_grid = pn.widgets.Tabulator(
+            bug_rows,
+            pagination='remote',
+            page_size=25,
+            show_index=False,
+            disabled=True,
+            sizing_mode='stretch_width',
+            header_filters=self.build_bug_filters(bug_rows),
+            sorters=[{'field': 'Priority', 'dir': 'asc'}],
+            row_content=self.render_bug_details,
+            embed_content=False
+        )
+        
+        def start_analysis(event, resume=False):
             """Start analysis in background thread"""
             if self.is_running:
                 return
             
             run_button.disabled = True
+            resume_button.disabled = True
             run_button.name = "🔄 Analysis Running..."
             
             def run_and_enable():
                 try:
-                    self.run_analysis(status_text)
+                    self.run_analysis(status_text, resume=resume)
                 finally:
                     run_button.disabled = False
+                    resume_button.disabled = False
                     run_button.name = "🔍 Start Bug Analysis"
             
             thread = threading.Thread(target=run_and_enable, daemon=True)
@@ -304,36 +471,60 @@ Waiting for analysis results...
         
         run_button.on_click(start_analysis)
         
+        # Push-based updates: refresh this session's grid as webhook-triggered analyses land
+        listener = get_listener()
+        if listener:
+            doc = pn.state.curdoc
+            
+            def on_record(record):
+                if doc is not None:
+                    doc.add_next_tick_callback(self.refresh_bug_grid)
+                else:
+                    self.refresh_bug_grid()
+            
+            listener.add_listener(on_record)
+            pn.state.on_session_destroyed(lambda session_context: listener.remove_listener(on_record))
+            status_text.object += f"\n\n📡 Listening for Jira webhooks on `{listener.url}`"
+        resume_button.on_click(lambda event: start_analysis(event, resume=True))
+        
         # Create template
         template = pn.template.MaterialTemplate(
             title="🐛 AI Bug Analysis Platform",
             sidebar=[
                 pn.pane.Markdown("## 🎛️ Control Panel"),
                 run_button,
+                resume_button,
                 pn.Spacer(height=20),
                 pn.pane.Markdown("## 📊 Status"),
                 status_text,
                 pn.Spacer(height=20),
-                pn.pane.Markdown("""
+                pn.pane.Markdown("## 🧭 Model Routing"),
+                self.routing_display,
+                pn.Spacer(height=20),
+                pn.pane.Markdown(f"""
 ## 📋 How it works
 1. Click **Start Bug Analysis**
 2. CrewAI agents analyze your Jira bugs
 3. Each agent writes results to output files
 4. Results appear in tabs as files are completed
+5. Expand a row in **Bugs** to load its context, analysis and solution
+6. If a run fails partway, **Resume Last Run** continues from the first unfinished stage
 
 ## 🔧 Output Files
 - `bug_intelligence_output.txt`
 - `context_analysis_output.txt`
 - `code_forensics_output.txt`
 - `strategic_reporting_output.txt`
+- `{REPORT_FILE}` (per-bug resolution handbook)
 """)
             ],
             main=[
                 pn.Tabs(
+                    ("🐞 Bugs", self.bug_grid),
                     ("🔍 Bug Intelligence", self.agent_displays["Bug Intelligence Specialist"]),
                     ("🔗 Context Analysis", self.agent_displays["Context Intelligence Analyst"]),
                     ("🤖 Code Forensics", self.agent_displays["Code Forensics Architect"]),
-                    ("📊 Strategic Report", self.agent_displays["Strategic Reporting Specialist"]),
+                    ("📊 Strategic Report", pn.Column(handbook_download, self.agent_displays["Strategic Reporting Specialist"])),
                     dynamic=True
                 )
             ]
@@ -0,0 +1,212 @@
+import json
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict, fields, replace
+from typing import Any, Dict, Iterable, List, Optional
+
+_records_dir = os.getenv('BUG_RECORDS_DIR', 'bug_records')
+# Per-context override, so a webhook job keeps its own store while crew runs repoint _records_dir
+_records_dir_override = contextvars.ContextVar('records_dir', default=None)
+
+# Pipeline stages in execution order; each stage appends full records to its own JSONL file
+STAGES = ('collected', 'enriched', 'analyzed')
+
+_lock = threading.Lock()
+
+# Per-stage read cache: path -> (bytes consumed, records); only appended lines are parsed
+_cache: Dict[str, tuple] = {}
+
+@dataclass(slots=True)
+class BugRecord:
+    """Compact per-bug record passed between pipeline stages"""
+    key: str
+    summary: str = ""
+    description: str = ""
+    priority: str = ""
+    status: str = ""
+    assignee: str = ""
+    updated: str = ""
+    linked_issues: List[str] = field(default_factory=list)
+    matched_files: List[str] = field(default_factory=list)
+    context: str = ""
+    analysis: str = ""
+    solution: str = ""
+    complexity: float = 0.0
+    tier: str = ""
+    steps_done: List[str] = field(default_factory=list)
+    stage: str = "collected"
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line: str) -> "BugRecord":
+        data = json.loads(line)
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    def prompt_context(self, limit: int = 1500) -> str:
+        """Render the fields an LLM needs, without re-sending stage prose"""
+        lines = [
+            f"Bug {self.key}: {self.summary}",
+            f"Priority: {self.priority or 'N/A'} | Status: {self.status or 'N/A'}",
+        ]
+        if self.linked_issues:
+            lines.append(f"Linked issues: {', '.join(self.linked_issues)}")
+        if self.matched_files:
+            lines.append(f"Matched files: {', '.join(self.matched_files)}")
+        if self.description:
+            lines.append(f"Description: {self.description}")
+        if self.context:
+            lines.append(f"Code context: {self.context}")
+        return "\n".join(lines)[:limit]
+
+    def is_done(self, step: str) -> bool:
+        return step in self.steps_done
+
+def adf_to_text(node: Any) -> str:
+    """Flatten a Jira Atlassian Document Format description into plain text"""
+    if node is None:
+        return ""
+    if isinstance(node, str):
+        return node
+    if isinstance(node, list):
+        return "".join(adf_to_text(child) for child in node)
+    if node.get('type') == 'text':
+        return node.get('text', '')
+    text = adf_to_text(node.get('content', []))
+    if node.get('type') in ('paragraph', 'heading', 'listItem', 'codeBlock'):
+        text += "\n"
+    return text
+
+def linked_issue_keys(fields: Dict[str, Any]) -> List[str]:
+    keys = []
+    for link in fields.get('issuelinks') or []:
+        for direction in ('outwardIssue', 'inwardIssue'):
+            if direction in link:
+                keys.append(link[direction]['key'])
+    return keys
+
+def record_from_jira_issue(issue: Dict[str, Any]) -> BugRecord:
+    """Build a BugRecord straight from a Jira issue payload"""
+    fields = issue.get('fields', {})
+    return BugRecord(
+        key=issue['key'],
+        summary=fields.get('summary') or "",
+        description=adf_to_text(fields.get('description')).strip(),
+        priority=(fields.get('priority') or {}).get('name', ""),
+        status=(fields.get('status') or {}).get('name', ""),
+        assignee=(fields.get('assignee') or {}).get('displayName', ""),
+        updated=fields.get('updated') or "",
+        linked_issues=linked_issue_keys(fields)
+    )
+
+def set_records_dir(path: str):
+    """Point the record store at a run directory (see checkpoint.py)"""
+    global _records_dir
+    with _lock:
+        _records_dir = path
+
+@contextmanager
+def records_dir_scope(path: str):
+    """Read and write records under path for everything run in this context, whatever set_records_dir does"""
+    token = _records_dir_override.set(path)
+    try:
+        yield path
+    finally:
+        _records_dir_override.reset(token)
+
+def get_records_dir() -> str:
+    return _records_dir_override.get() or _records_dir
+
+def stage_path(stage: str) -> str:
+    if stage not in STAGES:
+        raise ValueError(f"Unknown pipeline stage: {stage}")
+    return os.path.join(get_records_dir(), f"{stage}.jsonl")
+
+def reset_records():
+    """Remove all stage files so a new collection starts from an empty store"""
+    with _lock:
+        for stage in STAGES:
+            path = stage_path(stage)
+            if os.path.exists(path):
+                os.remove(path)
+            _cache.pop(path, None)
+
+def append_records(stage: str, records: Iterable[BugRecord]):
+    """Append records to a stage file; later lines for the same key win on read"""
+    path = stage_path(stage)
+    with _lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for record in records:
+                f.write(replace(record, stage=stage).to_json() + "\n")
+
+def reset_record(record: BugRecord):
+    """Restart one bug at the collected stage, superseding its lines in every later stage"""
+    fresh = replace(record, stage='collected', steps_done=[])
+    with _lock:
+        os.makedirs(get_records_dir(), exist_ok=True)
+        for stage in STAGES:
+            with open(stage_path(stage), 'a', encoding='utf-8') as f:
+                f.write(fresh.to_json() + "\n")
+
+def store_version() -> tuple:
+    """Cheap change marker for the current store: size and mtime of each stage file, without reading them"""
+    version = []
+    for stage in STAGES:
+        path = stage_path(stage)
+        try:
+            stat = os.stat(path)
+            version.append((path, stat.st_size, stat.st_mtime_ns))
+        except FileNotFoundError:
+            version.append((path, None, None))
+    return tuple(version)
+
+def read_records(stage: str) -> Dict[str, BugRecord]:
+    """Read a stage file into a dict keyed by issue key"""
+    path = stage_path(stage)
+    with _lock:
+        if not os.path.exists(path):
+            _cache.pop(path, None)
+            return {}
+        offset, records = _cache.get(path, (0, {}))
+        if os.path.getsize(path) < offset:
+            offset, records = 0, {}  # File was rewritten
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partial write; pick it up next time
+                offset += len(line)
+                line = line.strip()
+                if line:
+                    record = BugRecord.from_json(line.decode('utf-8'))
+                    records[record.key] = record
+        _cache[path] = (offset, records)
+        return dict(records)
+
+def load_latest_records() -> Dict[str, BugRecord]:
+    """Merge all stages so each key maps to its most advanced record"""
+    records = {}
+    for stage in STAGES:
+        records.update(read_records(stage))
+    return records
+
+def get_record(key: str) -> Optional[BugRecord]:
+    for stage in reversed(STAGES):
+        record = read_records(stage).get(key)
+        if record:
+            return record
+    return None
+
+def update_record(stage: str, key: str, step: Optional[str] = None, **changes) -> BugRecord:
+    """Advance a bug's latest record to the given stage with updated fields, marking step as done"""
+    record = get_record(key) or BugRecord(key=key)
+    if step and step not in record.steps_done:
+        changes['steps_done'] = record.steps_done + [step]
+    record = replace(record, **changes)
+    append_records(stage, [record])
+    return record
@@ -0,0 +1,134 @@
+import os
+import shutil
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Tuple
+from records import BugRecord
+from routing import route, generate
+from scheduler import QuotaExhaustedError
+
+REPORT_FILE = os.getenv('REPORT_FILE', 'bug_resolution_handbook.md')
+REPORT_WORKERS = int(os.getenv('REPORT_WORKERS', '4'))
+DIGEST_CHARS = 300
+REDUCE_FANOUT = 20
+TEXT_CHUNK_CHARS = 2000
+PRIORITY_RANK = {'Highest': 0, 'High': 1, 'Medium': 2, 'Low': 3, 'Lowest': 4}
+
+def _one_line(text: str, limit: int) -> str:
+    return " ".join(text.split())[:limit]
+
+def _digest(record: BugRecord) -> str:
+    """Bounded one-line summary of a bug, used as input to the reduce stage"""
+    return _one_line(f"{record.key} [{record.priority or 'N/A'}/{record.tier or 'n/a'}] {record.summary}: "
+                     f"{record.analysis or 'analysis pending'}", DIGEST_CHARS)
+
+def _render_section(record: BugRecord, body: str = "") -> str:
+    parts = [
+        f"## {record.key}: {record.summary}",
+        f"**Priority:** {record.priority or 'N/A'} | **Status:** {record.status or 'N/A'} | **Complexity tier:** {record.tier or 'n/a'}",
+    ]
+    if body:
+        parts.append(body)
+    else:
+        parts.append(f"### Root Cause Analysis\n{record.analysis or '*Not analyzed*'}")
+        parts.append(f"### Solution Steps\n{record.solution or '*No solution generated*'}")
+    return "\n\n".join(parts) + "\n\n"
+
+def build_section(record: BugRecord) -> Tuple[str, str]:
+    """Map step: one handbook section plus its digest for a single bug"""
+    if route(record) == 'trivial' or not (record.analysis or record.solution):
+        # Nothing for a model to add; render the recorded analysis directly
+        return _render_section(record), _digest(record)
+    prompt = f"""Write a concise bug resolution handbook entry for this bug with these subsections:
+Root Cause Analysis, Solution Steps, Risk Mitigation, Success Criteria, Prevention Measures.
+Use markdown '###' subsection headings and bullet points.
+
+{record.prompt_context()}
+Analysis: {record.analysis[:1500]}
+Solution: {record.solution[:1500]}"""
+    try:
+        return _render_section(record, generate(prompt)), _digest(record)
+    except QuotaExhaustedError:
+        raise
+    except Exception:
+        return _render_section(record), _digest(record)
+
+def _summarize_group(digests: List[str]) -> str:
+    prompt = ("Summarize these bug analyses into one short paragraph for an executive audience. "
+              "Name the most critical bugs, recurring root causes and recommended priorities.\n\n" + "\n".join(digests))
+    try:
+        return _one_line(generate(prompt), DIGEST_CHARS * 3)
+    except QuotaExhaustedError:
+        raise
+    except Exception:
+        return _one_line(" | ".join(digests), DIGEST_CHARS * 3)
+
+def reduce_digests(digests: List[str], executor: ThreadPoolExecutor) -> str:
+    """Reduce step: summarize digests in groups of REDUCE_FANOUT, level by level, until one remains"""
+    level = digests
+    while len(level) > 1:
+        groups = [level[i:i + REDUCE_FANOUT] for i in range(0, len(level), REDUCE_FANOUT)]
+        futures = [executor.submit(contextvars.copy_context().run, _summarize_group, group) for group in groups]
+        level = [future.result() for future in futures]
+    return level[0] if level else "No bugs were analyzed."
+
+def summarize_text(text: str) -> str:
+    """Map-reduce free text of any length down to a single summary"""
+    chunks = [text[i:i + TEXT_CHUNK_CHARS] for i in range(0, len(text), TEXT_CHUNK_CHARS)]
+    if len(chunks) <= 1:
+        return text
+    with ThreadPoolExecutor(max_workers=REPORT_WORKERS) as executor:
+        return reduce_digests(chunks, executor)
+
+def _sort_key(record: BugRecord):
+    return PRIORITY_RANK.get(record.priority, len(PRIORITY_RANK)), record.key
+
+def generate_report(records: Iterable[BugRecord], path: str = REPORT_FILE, workers: int = REPORT_WORKERS) -> str:
+    """Build the handbook for all records, streaming sections to disk; returns the executive summary.
+
+    Per-bug sections are generated concurrently with at most 2 * workers in flight and written
+    in priority order as they complete, so memory holds only the in-flight sections and one
+    bounded digest per bug. The executive summary is reduced from the digests and written ahead
+    of the sections once they are all on disk.
+    """
+    records = sorted(records, key=_sort_key)
+    sections_path = path + '.sections.tmp'
+    tmp_path = path + '.tmp'
+    digests = []
+    in_flight = deque()
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            try:
+                with open(sections_path, 'w', encoding='utf-8') as sections:
+                    for record in records:
+                        in_flight.append(executor.submit(contextvars.copy_context().run, build_section, record))
+                        if len(in_flight) >= workers * 2:
+                            section, digest = in_flight.popleft().result()
+                            sections.write(section)
+                            digests.append(digest)
+                    while in_flight:
+                        section, digest = in_flight.popleft().result()
+                        sections.write(section)
+                        digests.append(digest)
+
+                summary = reduce_digests(digests, executor)
+            finally:
+                # On failure, drop queued sections rather than generating them for nothing
+                for future in in_flight:
+                    future.cancel()
+
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            out.write("# 📋 COMPREHENSIVE BUG RESOLUTION HANDBOOK\n")
+            out.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | **Bugs covered:** {len(digests)}\n\n")
+            out.write(f"## Executive Summary\n\n{summary}\n\n")
+            with open(sections_path, 'r', encoding='utf-8') as sections:
+                shutil.copyfileobj(sections, out)
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in (sections_path, tmp_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return summary
@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+import google.generativeai as genai
+from records import BugRecord
+from scheduler import scheduler
+
+# Model per complexity tier; trivial bugs go to the smallest model (or a template)
+TIERS = ('trivial', 'standard', 'complex')
+TIER_MODELS = {
+    'trivial': os.getenv('GEMINI_MODEL_LIGHT', 'gemini-1.5-flash-8b'),
+    'standard': os.getenv('GEMINI_MODEL_STANDARD', 'gemini-1.5-flash'),
+    'complex': os.getenv('GEMINI_MODEL_HEAVY', 'gemini-1.5-pro'),
+}
+
+# USD per 1M (input, output) tokens, used for per-run cost estimates
+TIER_PRICING = {
+    'trivial': (0.0375, 0.15),
+    'standard': (0.075, 0.30),
+    'complex': (1.25, 5.00),
+}
+
+TRIVIAL_THRESHOLD = 2.0
+COMPLEX_THRESHOLD = 6.0
+CHARS_PER_TOKEN = 4
+ROUTING_STATS_FILE = 'routing_stats.json'
+
+STACK_TRACE_PATTERN = re.compile(
+    r'Traceback \(most recent call last\)|^\s+at [\w$.<>]+\(|^\s*File ".+", line \d+|\b\w+(?:Error|Exception):\s',
+    re.MULTILINE
+)
+TYPO_PATTERN = re.compile(r'\b(typo|misspel\w*|spelling|wording|label text|copy change|grammar)\b', re.IGNORECASE)
+
+def complexity_score(record: BugRecord) -> float:
+    """Cheap local estimate of how hard a bug is to analyze"""
+    score = min(len(record.description) / 500, 4.0)
+    if STACK_TRACE_PATTERN.search(record.description):
+        score += 3.0
+    score += min(len(record.linked_issues), 4) * 0.75
+    score += min(len(record.matched_files), 5) * 0.5
+    return round(score, 2)
+
+def route(record: BugRecord) -> str:
+    score = complexity_score(record)
+    if score < TRIVIAL_THRESHOLD:
+        return 'trivial'
+    if score >= COMPLEX_THRESHOLD:
+        return 'complex'
+    return 'standard'
+
+def template_response(record: BugRecord, kind: str) -> Optional[str]:
+    """Deterministic answer for trivial copy/typo bugs, or None if a model is needed"""
+    if not TYPO_PATTERN.search(f"{record.summary}\n{record.description}"):
+        return None
+    if kind == 'analysis':
+        return (f"**{record.key}** is a text/copy defect (\"{record.summary}\"). "
+                "No logic change is involved; the incorrect string is rendered as written in the source or translation files.")
+    return ("1. Search the codebase and translation files for the incorrect text.\n"
+            "2. Correct the string at each occurrence.\n"
+            "3. Update any snapshot or UI tests that assert on the old text.\n"
+            "4. Verify the corrected text in the affected screen.")
+
+AGENT_USAGE_FIELDS = ('successful_requests', 'prompt_tokens', 'completion_tokens', 'total_tokens')
+
+class RoutingStats:
+    """Thread-safe per-tier latency and cost accounting for one run.
+
+    Tiers cover every call made through generate()/generate_for_bug(). The agents' own LLM
+    calls go through litellm, not this module, so they are only added afterwards as token
+    totals from the crew's usage metrics, without per-tier latency or cost.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.tiers = {tier: {'calls': 0, 'templated': 0, 'latency_s': 0.0,
+                                 'input_tokens': 0, 'output_tokens': 0, 'cost_usd': 0.0} for tier in TIERS}
+            self.agents = {name: 0 for name in AGENT_USAGE_FIELDS}
+
+    @classmethod
+    def load(cls, path: str) -> "RoutingStats":
+        """Stats saved by an earlier attempt of the same run, or empty stats if there are none"""
+        stats = cls()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            for tier, counters in stats.tiers.items():
+                counters.update({name: saved.get(tier, {}).get(name, value) for name, value in counters.items()})
+            stats.agents.update({name: saved.get('agents', {}).get(name, 0) for name in AGENT_USAGE_FIELDS})
+        return stats
+
+    def record(self, tier: str, latency: float, input_tokens: int = 0, output_tokens: int = 0, templated: bool = False):
+        input_price, output_price = TIER_PRICING[tier]
+        with self._lock:
+            stats = self.tiers[tier]
+            stats['calls'] += 1
+            stats['templated'] += int(templated)
+            stats['latency_s'] += latency
+            stats['input_tokens'] += input_tokens
+            stats['output_tokens'] += output_tokens
+            stats['cost_usd'] += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def record_agent_usage(self, usage: Any):
+        """Add a crew's litellm token usage (crew.usage_metrics, a dict or model)"""
+        if usage is None:
+            return
+        if hasattr(usage, 'model_dump'):
+            usage = usage.model_dump()
+        with self._lock:
+            for name in AGENT_USAGE_FIELDS:
+                self.agents[name] += int(usage.get(name) or 0)
+
+    def summary(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {tier: dict(stats, model=TIER_MODELS[tier],
+                               avg_latency_s=round(stats['latency_s'] / stats['calls'], 3) if stats['calls'] else 0.0)
+                    for tier, stats in self.tiers.items()}
+
+    def to_markdown(self) -> str:
+        lines = ["| Tier | Model | Calls | Templated | Avg latency | Est. cost |", "|---|---|---|---|---|---|"]
+        for tier, stats in self.summary().items():
+            lines.append(f"| {tier} | `{stats['model']}` | {stats['calls']} | {stats['templated']} | "
+                         f"{stats['avg_latency_s']:.2f}s | ${stats['cost_usd']:.4f} |")
+        with self._lock:
+            agents = dict(self.agents)
+        lines.append(f"\nAgent LLM calls (not routed, excluded above): {agents['successful_requests']} requests, "
+                     f"{agents['prompt_tokens']} prompt / {agents['completion_tokens']} completion tokens")
+        return "\n".join(lines)
+
+    def save(self, path: str = ROUTING_STATS_FILE):
+        with self._lock:
+            agents = dict(self.agents)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(dict(self.summary(), agents=agents), f, indent=2)
+
+# Calls outside a crew run (webhook jobs, ad-hoc tool use) are accounted here
+background_stats = RoutingStats()
+_current_stats = contextvars.ContextVar('routing_stats', default=background_stats)
+
+@contextmanager
+def stats_scope(stats: RoutingStats):
+    """Account routed calls made in this context (and contexts copied from it) to the given stats"""
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+def current_stats() -> RoutingStats:
+    return _current_stats.get()
+
+def generate(prompt: str, tier: str = 'standard') -> str:
+    """Run a prompt on the tier's model and record latency and estimated cost"""
+    genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+    model = genai.GenerativeModel(TIER_MODELS[tier])
+    start = time.perf_counter()
+    response = scheduler.call('gemini', model.generate_content, prompt)
+    latency = time.perf_counter() - start
+
+    usage = getattr(response, 'usage_metadata', None)
+    input_tokens = getattr(usage, 'prompt_token_count', 0) or len(prompt) // CHARS_PER_TOKEN
+    output_tokens = getattr(usage, 'candidates_token_count', 0) or len(response.text) // CHARS_PER_TOKEN
+    current_stats().record(tier, latency, input_tokens, output_tokens)
+    return response.text
+
+def generate_for_bug(record: BugRecord, prompt: str, kind: str) -> str:
+    """Answer a per-bug prompt from a template or the model its complexity tier calls for"""
+    tier = route(record)
+    if tier == 'trivial':
+        start = time.perf_counter()
+        text = template_response(record, kind)
+        if text is not None:
+            current_stats().record(tier, time.perf_counter() - start, templated=True)
+            return text
+    return generate(prompt, tier)
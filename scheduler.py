@@ -0,0 +1,229 @@
+import os
+import time
+import heapq
+import random
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Lower value runs first: interactive dashboard work jumps ahead of background runs
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_priority = contextvars.ContextVar('request_priority', default=PRIORITY_BACKGROUND)
+_exhaustions = contextvars.ContextVar('quota_exhaustions', default=None)
+
+THROTTLE_STATUS_CODES = {429, 503}
+THROTTLE_EXCEPTION_NAMES = {'RateLimitExceededException', 'ResourceExhausted', 'TooManyRequests'}
+# GitHub's 403 rate-limit bodies and Gemini's quota errors, for exceptions without a telling type or status
+THROTTLE_MESSAGES = ('rate limit exceeded', 'secondary rate limit', 'resource has been exhausted', 'quota exceeded')
+
+class QuotaExhaustedError(Exception):
+    """Raised when a service keeps throttling after all retries, instead of returning partial output"""
+
+    def __init__(self, service: str, attempts: int):
+        super().__init__(f"{service} rate limit still exceeded after {attempts} attempts")
+        self.service = service
+        self.attempts = attempts
+
+@contextmanager
+def priority_scope(priority: int):
+    """Run every scheduled call made in this context at the given priority"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+@contextmanager
+def exhaustion_scope(errors: List[QuotaExhaustedError]):
+    """Collect every QuotaExhaustedError raised in this context, even ones a caller swallows.
+
+    CrewAI catches tool exceptions and retries the tool, so a crew run checks this list to stop.
+    """
+    token = _exhaustions.set(errors)
+    try:
+        yield errors
+    finally:
+        _exhaustions.reset(token)
+
+class ServiceBudget:
+    """Adaptive concurrency budget and throttle state for one external service"""
+
+    def __init__(self, name: str, max_concurrency: int, min_concurrency: int = 1,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0,
+                 low_remaining: int = 5):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.low_remaining = low_remaining
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.waiters = []
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+def _header(headers: Any, name: str) -> Optional[str]:
+    if not headers:
+        return None
+    for key, value in headers.items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+def _reset_delay(headers: Any) -> Optional[float]:
+    """Seconds until the rate-limit window resets, from Retry-After or X-RateLimit-Reset (epoch seconds)"""
+    retry_after = _parse_retry_after(_header(headers, 'Retry-After'))
+    if retry_after is not None:
+        return retry_after
+    reset = _header(headers, 'X-RateLimit-Reset')
+    if reset:
+        try:
+            return max(float(reset) - time.time(), 0.0)
+        except ValueError:
+            return None
+    return None
+
+def _throttle_from_exception(exc: Exception) -> Optional[float]:
+    """Return a delay hint (0.0 if unknown) when the exception is a rate-limit/quota error, else None"""
+    name = type(exc).__name__
+    status = getattr(exc, 'status', None) or getattr(exc, 'code', None)
+    message = str(exc).lower()
+    if (name in THROTTLE_EXCEPTION_NAMES or status in THROTTLE_STATUS_CODES
+            or any(phrase in message for phrase in THROTTLE_MESSAGES)):
+        return _reset_delay(getattr(exc, 'headers', None)) or 0.0
+    return None
+
+class RequestScheduler:
+    """Single gateway for Jira, GitHub and Gemini calls.
+
+    Each service gets its own concurrency budget that shrinks multiplicatively when the service
+    throttles and grows additively while calls succeed. Rate-limit headers pause the whole service
+    until its window resets, throttled calls retry with jittered exponential backoff, and waiting
+    calls are admitted in priority order. Once a service exhausts its retries, further calls to it
+    fail fast for max_delay seconds rather than repeating the whole backoff.
+
+    The agents' own LLM calls are made by CrewAI through litellm and do not pass through here.
+    """
+
+    def __init__(self, budgets: Dict[str, ServiceBudget]):
+        self.budgets = budgets
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._exhausted = {}
+
+    def _acquire(self, budget: ServiceBudget, priority: int):
+        with self._cond:
+            ticket = (priority, next(self._counter))
+            heapq.heappush(budget.waiters, ticket)
+            while True:
+                now = time.monotonic()
+                if (budget.waiters[0] == ticket and budget.in_flight < int(budget.limit)
+                        and now >= budget.paused_until):
+                    heapq.heappop(budget.waiters)
+                    budget.in_flight += 1
+                    self._cond.notify_all()
+                    return
+                self._cond.wait(budget.paused_until - now if budget.paused_until > now else None)
+
+    def _release(self, budget: ServiceBudget, throttled: bool, pause: Optional[float]):
+        with self._cond:
+            budget.in_flight -= 1
+            if throttled:
+                budget.limit = max(float(budget.min_concurrency), budget.limit / 2)
+            else:
+                budget.limit = min(float(budget.max_concurrency), budget.limit + 1 / budget.limit)
+            if pause:
+                budget.paused_until = max(budget.paused_until, time.monotonic() + pause)
+            self._cond.notify_all()
+
+    def _inspect_response(self, budget: ServiceBudget, response: Any,
+                          rate_limit: Optional[Callable[[], Tuple[int, float]]] = None):
+        """Return (throttled, pause) for a call result.
+
+        HTTP responses are checked for throttling status codes and rate-limit headers. Clients
+        whose results are not responses (PyGithub) pass rate_limit, which reports the remaining
+        calls and reset epoch from the client's last response instead.
+        """
+        status = getattr(response, 'status_code', None)
+        headers = getattr(response, 'headers', None) if status is not None else None
+        if status in THROTTLE_STATUS_CODES:
+            return True, _reset_delay(headers)
+        if rate_limit is not None:
+            remaining, reset_at = rate_limit()
+            delay = max(reset_at - time.time(), 0.0) if reset_at else None
+        else:
+            value = _header(headers, 'X-RateLimit-Remaining')
+            remaining = int(value) if value is not None and value.isdigit() else None
+            delay = _reset_delay(headers)
+        if remaining is not None and 0 <= remaining <= budget.low_remaining:
+            # Nearly out of quota: let this call through but hold the service until the window resets
+            return False, delay
+        return False, None
+
+    def _backoff(self, budget: ServiceBudget, attempt: int) -> float:
+        return random.uniform(0, min(budget.max_delay, budget.base_delay * 2 ** attempt))
+
+    def _exhaust(self, budget: ServiceBudget, attempts: int, fresh: bool = True) -> QuotaExhaustedError:
+        """Record that a service ran out of quota and report it to the current exhaustion scope"""
+        if fresh:
+            with self._cond:
+                self._exhausted[budget.name] = (time.monotonic(), attempts)
+        error = QuotaExhaustedError(budget.name, attempts)
+        errors = _exhaustions.get()
+        if errors is not None:
+            errors.append(error)
+        return error
+
+    def call(self, service: str, fn: Callable, *args,
+             rate_limit: Optional[Callable[[], Tuple[int, float]]] = None, **kwargs):
+        """Run fn through the service's budget, retrying throttled calls (see _inspect_response for rate_limit)"""
+        budget = self.budgets[service]
+        priority = _priority.get()
+        with self._cond:
+            exhausted_at, attempts = self._exhausted.get(service, (None, 0))
+        if exhausted_at is not None and time.monotonic() - exhausted_at < budget.max_delay:
+            raise self._exhaust(budget, attempts, fresh=False)
+        for attempt in range(budget.max_retries + 1):
+            self._acquire(budget, priority)
+            throttled, pause = False, None
+            try:
+                try:
+                    result = fn(*args, **kwargs)
+                    throttled, pause = self._inspect_response(budget, result, rate_limit)
+                except Exception as e:
+                    pause = _throttle_from_exception(e)
+                    if pause is None:
+                        raise
+                    throttled = True
+            finally:
+                # Every acquired slot is released exactly once, whatever fn or the inspection raised
+                self._release(budget, throttled, pause)
+            if not throttled:
+                return result
+            if attempt < budget.max_retries:
+                time.sleep(self._backoff(budget, attempt))
+        raise self._exhaust(budget, budget.max_retries + 1)
+
+scheduler = RequestScheduler({
+    'jira': ServiceBudget('jira', int(os.getenv('JIRA_MAX_CONCURRENCY', '4'))),
+    'github': ServiceBudget('github', int(os.getenv('GITHUB_MAX_CONCURRENCY', '4'))),
+    'gemini': ServiceBudget('gemini', int(os.getenv('GEMINI_MAX_CONCURRENCY', '2'))),
+})
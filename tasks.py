@@ -7,38 +7,42 @@ class BugAnalysisTasks:
         with open('config/tasks.yaml', 'r') as f:
             self.task_configs = yaml.safe_load(f)
     
-    def collect_bugs_task(self, agent):
+    def collect_bugs_task(self, agent, callback=None):
         config = self.task_configs['bug_collection_task']
         return Task(
             description=config['description'],
             agent=agent,
             expected_output=config['expected_output'],
-            output_file=config.get('output_file')
+            output_file=config.get('output_file'),
+            callback=callback
         )
     
-    def enrich_context_task(self, agent):
+    def enrich_context_task(self, agent, callback=None):
         config = self.task_configs['context_enrichment_task']
         return Task(
             description=config['description'],
             agent=agent,
             expected_output=config['expected_output'],
-            output_file=config.get('output_file')
+            output_file=config.get('output_file'),
+            callback=callback
         )
     
-    def analyze_solution_task(self, agent):
+    def analyze_solution_task(self, agent, callback=None):
         config = self.task_configs['code_analysis_task']
         return Task(
             description=config['description'],
             agent=agent,
             expected_output=config['expected_output'],
-            output_file=config.get('output_file')
+            output_file=config.get('output_file'),
+            callback=callback
         )
     
-    def report_results_task(self, agent):
+    def report_results_task(self, agent, callback=None):
         config = self.task_configs['reporting_task']
         return Task(
             description=config['description'],
             agent=agent,
             expected_output=config['expected_output'],
-            output_file=config.get('output_file')
+            output_file=config.get('output_file'),
+            callback=callback
         )
\ No newline at end of file
@@ -0,0 +1,83 @@
+import time
+
+import pytest
+
+from scheduler import RequestScheduler, ServiceBudget, QuotaExhaustedError
+
+def make_scheduler(concurrency=2):
+    budget = ServiceBudget('svc', concurrency, max_retries=1, base_delay=0.01, max_delay=0.5)
+    return RequestScheduler({'svc': budget}), budget
+
+class ExplodingHeaders:
+    """Mimics a lazy PyGithub object whose header access fires an unscheduled request that fails"""
+
+    @property
+    def headers(self):
+        raise RuntimeError("lazy completion failed")
+
+    @property
+    def raw_headers(self):
+        raise RuntimeError("lazy completion failed")
+
+class Response:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+def test_lazy_result_headers_are_never_read():
+    scheduler, budget = make_scheduler()
+
+    for _ in range(3):
+        assert isinstance(scheduler.call('svc', ExplodingHeaders), ExplodingHeaders)
+    assert budget.in_flight == 0
+
+def test_failing_rate_limit_read_releases_the_slot():
+    scheduler, budget = make_scheduler()
+
+    def broken_rate_limit():
+        raise RuntimeError("rate limit lookup failed")
+
+    for _ in range(3):  # More calls than slots: a leaked slot would block here
+        with pytest.raises(RuntimeError):
+            scheduler.call('svc', lambda: 'ok', rate_limit=broken_rate_limit)
+    assert budget.in_flight == 0
+    assert scheduler.call('svc', lambda: 'ok') == 'ok'
+
+def test_low_remaining_pauses_the_service():
+    scheduler, budget = make_scheduler()
+
+    scheduler.call('svc', lambda: 'ok', rate_limit=lambda: (1, time.time() + 30))
+    assert budget.paused_until > time.monotonic() + 20
+
+    scheduler, budget = make_scheduler()
+    scheduler.call('svc', lambda: Response(200, {'x-ratelimit-remaining': '2', 'retry-after': '30'}))
+    assert budget.paused_until > time.monotonic() + 20
+
+def test_unrelated_errors_mentioning_quota_are_not_retried():
+    scheduler, budget = make_scheduler()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("invalid quota field")
+
+    with pytest.raises(ValueError):
+        scheduler.call('svc', fail)
+    assert len(calls) == 1
+    assert budget.in_flight == 0
+
+def test_throttled_calls_exhaust_then_fail_fast():
+    scheduler, budget = make_scheduler()
+    calls = []
+
+    def throttled():
+        calls.append(1)
+        return Response(429, {})
+
+    with pytest.raises(QuotaExhaustedError):
+        scheduler.call('svc', throttled)
+    assert len(calls) == budget.max_retries + 1
+    with pytest.raises(QuotaExhaustedError):
+        scheduler.call('svc', throttled)
+    assert len(calls) == budget.max_retries + 1  # Failed fast without calling again
+    assert budget.in_flight == 0
@@ -0,0 +1,98 @@
+import threading
+import time
+
+import pytest
+
+from records import record_from_jira_issue
+from webhook import KeyDebouncer, WebhookListener, replay_events
+
+def bug_event(key, summary, issue_type='Bug', event='jira:issue_updated'):
+    return {
+        'webhookEvent': event,
+        'issue': {'key': key, 'fields': {'summary': summary, 'issuetype': {'name': issue_type}}}
+    }
+
+class StubPipeline:
+    """Records each call; optionally blocks the first call until released"""
+
+    def __init__(self, block_first=False):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.called = threading.Condition()
+        if not block_first:
+            self.release.set()
+
+    def __call__(self, issue):
+        self.started.set()
+        if len(self.calls) == 0:
+            self.release.wait(5)
+        with self.called:
+            self.calls.append((issue['key'], issue['fields']['summary']))
+            self.called.notify_all()
+        return record_from_jira_issue(issue)
+
+    def wait_for_calls(self, count, timeout=5):
+        with self.called:
+            return self.called.wait_for(lambda: len(self.calls) >= count, timeout)
+
+@pytest.fixture
+def make_listener():
+    listeners = []
+
+    def make(pipeline, secret=None):
+        listener = WebhookListener(port=0, secret=secret, pipeline=pipeline,
+                                   debouncer=KeyDebouncer(0.1, 0.5)).start()
+        listeners.append(listener)
+        return listener
+
+    yield make
+    for listener in listeners:
+        listener.stop()
+
+def test_burst_for_one_key_runs_pipeline_once_with_latest_payload(make_listener):
+    pipeline = StubPipeline()
+    listener = make_listener(pipeline)
+
+    codes = replay_events(listener.url, [bug_event('BUG-1', f"edit {i}") for i in range(5)])
+
+    assert codes == [202] * 5
+    assert pipeline.wait_for_calls(1)
+    time.sleep(0.3)  # Well past the debounce delay: no further runs
+    assert pipeline.calls == [('BUG-1', 'edit 4')]
+
+def test_non_bug_events_are_ignored(make_listener):
+    pipeline = StubPipeline()
+    listener = make_listener(pipeline)
+
+    codes = replay_events(listener.url, [
+        bug_event('TASK-1', 'a task', issue_type='Task'),
+        bug_event('BUG-2', 'deleted', event='jira:issue_deleted'),
+    ])
+
+    assert codes == [204, 204]
+    time.sleep(0.3)
+    assert pipeline.calls == []
+
+def test_bad_signature_is_rejected(make_listener):
+    pipeline = StubPipeline()
+    listener = make_listener(pipeline, secret='s3cret')
+
+    assert replay_events(listener.url, [bug_event('BUG-3', 'forged')], secret='wrong') == [401]
+    assert replay_events(listener.url, [bug_event('BUG-3', 'signed')], secret='s3cret') == [202]
+    assert pipeline.wait_for_calls(1)
+    assert pipeline.calls == [('BUG-3', 'signed')]
+
+def test_edit_during_run_is_requeued_after_it(make_listener):
+    pipeline = StubPipeline(block_first=True)
+    listener = make_listener(pipeline)
+
+    replay_events(listener.url, [bug_event('BUG-4', 'first')])
+    assert pipeline.started.wait(5)
+    replay_events(listener.url, [bug_event('BUG-4', 'second')])
+    time.sleep(0.3)  # Debounced edit is due, but the key is still running
+    assert pipeline.calls == []
+
+    pipeline.release.set()
+    assert pipeline.wait_for_calls(2)
+    assert pipeline.calls == [('BUG-4', 'first'), ('BUG-4', 'second')]
@@ -1,34 +1,181 @@
 import os
+import re
+import mmap
+import heapq
 import requests
 from github import Github
-import google.generativeai as genai
 from crewai.tools import tool
 from typing import Dict, List, Union, Any
 import json
 from datetime import datetime
+from records import BugRecord, record_from_jira_issue, linked_issue_keys, reset_records, append_records, load_latest_records, get_record, update_record
+from routing import complexity_score, route, generate, generate_for_bug
+from scheduler import scheduler, QuotaExhaustedError
+from reporting import generate_report, summarize_text, REPORT_FILE
+
+SOURCE_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.html', '.css', '.php', '.py')
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', '.venv', 'venv', 'dist', 'build'}
+BINARY_SNIFF_BYTES = 8192
+CONTEXT_LINES = 2
+MAX_MATCHES_PER_FILE = 5
+MAX_LOCAL_FILES = 10
+MAX_LINE_BYTES = 400
+NEWLINE_COUNT_CHUNK = 1 << 20
+ISSUE_KEY_PATTERN = re.compile(r'^[A-Z][A-Z0-9]+-\d+$')
+JIRA_BUG_FIELDS = 'key,summary,description,status,assignee,priority,updated,issuelinks'
+
+def _extract_bug_keywords(bug_description: str) -> List[str]:
+    """Extract searchable keywords (error messages, technical terms) from a bug description"""
+    bug_lower = bug_description.lower()
+    
+    # Extract technical terms, error messages, and relevant keywords
+    bug_keywords = []
+    
+    # Extract quoted error messages
+    error_matches = re.findall(r'"([^"]+)"', bug_description)
+    error_matches.extend(re.findall(r"'([^']+)'", bug_description))
+    bug_keywords.extend([match.lower() for match in error_matches if len(match) > 2])
+    
+    # Extract technical terms (words that might be function names, libraries, etc.)
+    tech_words = re.findall(r'\b[A-Z][a-zA-Z]*\b|\b[a-z]+[A-Z][a-zA-Z]*\b', bug_description)
+    bug_keywords.extend([word.lower() for word in tech_words])
+    
+    # Extract common technical keywords from description
+    common_terms = ['error', 'undefined', 'null', 'function', 'script', 'widget', 'button', 'click', 'load', 'init']
+    for term in common_terms:
+        if term in bug_lower:
+            bug_keywords.append(term)
+    
+    # Extract words from the bug description (filter out common words)
+    stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'}
+    words = re.findall(r'\b[a-zA-Z]{3,}\b', bug_lower)
+    meaningful_words = [word for word in words if word not in stop_words and len(word) > 2]
+    bug_keywords.extend(meaningful_words[:10])  # Limit to top 10 meaningful words
+    
+    # Remove duplicates and empty strings
+    return list(set([kw for kw in bug_keywords if kw and len(kw) > 1]))
+
+def _resolve_bug_record(value: Any) -> Union[BugRecord, None]:
+    """Return the stored record when a tool is called with a bare issue key"""
+    if isinstance(value, dict):
+        value = value.get('value', '')
+    if isinstance(value, str) and ISSUE_KEY_PATTERN.match(value.strip()):
+        return get_record(value.strip())
+    return None
+
+def _cached_scan_summary(record: BugRecord) -> str:
+    """Compact scan result for a bug whose scan already completed in this run"""
+    if not record.matched_files:
+        return f"Codebase scan for {record.key} (from checkpoint): no directly relevant files found\n"
+    summary = f"Codebase scan for {record.key} (from checkpoint): {', '.join(record.matched_files)}\n"
+    if record.context:
+        summary += f"Code hits: {record.context}\n"
+    return summary
+
+def _merge_unique(existing: List[str], new: List[str]) -> List[str]:
+    return list(dict.fromkeys(existing + new))
+
+def _is_binary_file(path: str) -> bool:
+    """Treat a file as binary if its first block contains a NUL byte"""
+    with open(path, 'rb') as f:
+        return b'\0' in f.read(BINARY_SNIFF_BYTES)
+
+def _count_newlines(mm, start: int, end: int) -> int:
+    """Count newlines in mm[start:end] without copying more than one chunk at a time"""
+    count = 0
+    while start < end:
+        stop = min(start + NEWLINE_COUNT_CHUNK, end)
+        count += mm[start:stop].count(b'\n')
+        start = stop
+    return count
+
+def _line_bounds(mm, pos: int):
+    """Return (start, end) byte offsets of the line containing pos, capped at MAX_LINE_BYTES each way"""
+    start = mm.rfind(b'\n', max(0, pos - MAX_LINE_BYTES), pos) + 1
+    if start == 0 and pos > MAX_LINE_BYTES:
+        start = pos - MAX_LINE_BYTES
+    end = mm.find(b'\n', pos, pos + MAX_LINE_BYTES)
+    if end == -1:
+        end = min(len(mm), pos + MAX_LINE_BYTES)
+    return start, end
+
+def _context_window(mm, pos: int) -> List[str]:
+    """Decode only the matched line plus CONTEXT_LINES neighbours on each side.
+    
+    Each line is capped at MAX_LINE_BYTES either side of its anchor, and the window stops
+    extending at a capped edge, so a one-line minified bundle yields a single capped line.
+    """
+    start, end = _line_bounds(mm, pos)
+    for _ in range(CONTEXT_LINES):
+        if start == 0 or mm[start - 1:start] != b'\n':
+            break  # Start of file, or the line was capped
+        start = _line_bounds(mm, start - 1)[0]
+    for _ in range(CONTEXT_LINES):
+        if end >= len(mm) or mm[end:end + 1] != b'\n':
+            break  # End of file, or the line was capped
+        end = _line_bounds(mm, end + 1)[1]
+    return mm[start:end].decode('utf-8', errors='replace').splitlines()
+
+def _scan_file_for_keywords(path: str, pattern):
+    """Search a file with a compiled bytes regex over an mmap.
+    
+    Returns (matches, keywords): up to MAX_MATCHES_PER_FILE line-numbered context windows and
+    the set of distinct keywords found anywhere in the file, or None for empty/binary files.
+    Memory use is bounded by the context window size regardless of file size; only matched
+    regions are decoded.
+    """
+    if os.path.getsize(path) == 0 or _is_binary_file(path):
+        return None
+    
+    matches = []
+    keywords = set()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        line_no = 1
+        last_pos = 0
+        last_line_end = -1
+        for match in pattern.finditer(mm):
+            keywords.add(match.group(0).decode('utf-8', errors='replace').lower())
+            pos = match.start()
+            if len(matches) >= MAX_MATCHES_PER_FILE or pos <= last_line_end:
+                continue  # Only collecting keywords now, or already reported this line
+            line_no += _count_newlines(mm, last_pos, pos)
+            last_pos = pos
+            last_line_end = _line_bounds(mm, pos)[1]
+            matches.append({
+                'line': line_no,
+                'keyword': match.group(0).decode('utf-8', errors='replace').lower(),
+                'context': _context_window(mm, pos)
+            })
+    return matches, keywords
 
 @tool
 def get_jira_bugs() -> str:
-    """Fetch all open Bug issues from Jira project"""
+    """Fetch all open Bug issues from Jira project and store them as per-bug records"""
     try:
         base_url = os.getenv('JIRA_URL')
         auth = (os.getenv('JIRA_EMAIL'), os.getenv('JIRA_API_TOKEN'))
         jql = 'project = "SCRUM" AND issuetype = Bug AND status != Done'
         
-        response = requests.get(
+        response = scheduler.call(
+            'jira', requests.get,
             f"{base_url}/rest/api/3/search",
-            params={'jql': jql, 'fields': 'key,summary,description,status,assignee,priority'},
+            params={'jql': jql, 'fields': JIRA_BUG_FIELDS},
             auth=auth
         )
         
         if response.status_code == 200:
             issues = response.json().get('issues', [])
-            result = f"Found {len(issues)} open bugs:\n"
-            for issue in issues:
-                result += f"- {issue['key']}: {issue['fields']['summary']}\n"
-            return result
+            records = [record_from_jira_issue(issue) for issue in issues]
+            reset_records()
+            append_records('collected', records)
+            
+            lines = [f"Found {len(records)} open bugs:"]
+            lines.extend(f"- {r.key} [{r.priority or 'N/A'}/{r.status or 'N/A'}]: {r.summary}" for r in records)
+            return "\n".join(lines) + "\n"
         else:
             return f"Error fetching bugs: {response.status_code} - {response.text}"
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"Error in get_jira_bugs: {str(e)}"
 
@@ -36,10 +183,15 @@ def get_jira_bugs() -> str:
 def get_jira_issue_details(issue_key: str) -> str:
     """Get detailed information for a specific Jira issue"""
     try:
+        record = _resolve_bug_record(issue_key)
+        if record:
+            return record.prompt_context()
+        
         base_url = os.getenv('JIRA_URL')
         auth = (os.getenv('JIRA_EMAIL'), os.getenv('JIRA_API_TOKEN'))
         
-        response = requests.get(
+        response = scheduler.call(
+            'jira', requests.get,
             f"{base_url}/rest/api/3/issue/{issue_key}",
             auth=auth
         )
@@ -50,6 +202,8 @@ def get_jira_issue_details(issue_key: str) -> str:
             return f"Issue {issue_key}:\nSummary: {fields.get('summary', 'N/A')}\nDescription: {fields.get('description', 'N/A')}\nStatus: {fields.get('status', {}).get('name', 'N/A')}\nPriority: {fields.get('priority', {}).get('name', 'N/A')}"
         else:
             return f"Error fetching issue details: {response.status_code}"
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"Error in get_jira_issue_details: {str(e)}"
 
@@ -64,29 +218,40 @@ def get_linked_jira_issues(issue_key: Union[str, dict, Any]) -> str:
             return "No issue key provided"
         else:
             issue_key = str(issue_key)
+        
+        # Resumed runs reuse links already recorded for this bug
+        record = get_record(issue_key)
+        if record and record.is_done('links'):
+            if not record.linked_issues:
+                return f"No linked issues found for {issue_key}"
+            return f"Linked issues for {issue_key} (from checkpoint): {', '.join(record.linked_issues)}\n"
             
         base_url = os.getenv('JIRA_URL')
         auth = (os.getenv('JIRA_EMAIL'), os.getenv('JIRA_API_TOKEN'))
         
-        response = requests.get(
+        response = scheduler.call(
+            'jira', requests.get,
             f"{base_url}/rest/api/3/issue/{issue_key}?expand=issuelinks",
             auth=auth
         )
         
         if response.status_code == 200:
             links = response.json().get('fields', {}).get('issuelinks', [])
+            if record:
+                update_record('enriched', issue_key, step='links', linked_issues=linked_issue_keys({'issuelinks': links}))
             if links:
-                result = f"Linked issues for {issue_key}:\n"
+                lines = [f"Linked issues for {issue_key}:"]
                 for link in links:
-                    if 'outwardIssue' in link:
-                        result += f"- {link['outwardIssue']['key']}: {link['outwardIssue']['fields']['summary']}\n"
-                    if 'inwardIssue' in link:
-                        result += f"- {link['inwardIssue']['key']}: {link['inwardIssue']['fields']['summary']}\n"
-                return result
+                    for direction in ('outwardIssue', 'inwardIssue'):
+                        if direction in link:
+                            lines.append(f"- {link[direction]['key']}: {link[direction]['fields']['summary']}")
+                return "\n".join(lines) + "\n"
             else:
                 return f"No linked issues found for {issue_key}"
         else:
             return f"Error fetching linked issues: {response.status_code}"
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"Error in get_linked_jira_issues: {str(e)}"
 
@@ -94,8 +259,14 @@ def get_linked_jira_issues(issue_key: Union[str, dict, Any]) -> str:
 def analyze_entire_codebase(bug_description: Union[str, dict, Any]) -> str:
     """Analyze GitHub repository codebase for bug-related files and code content"""
     try:
+        # A bare issue key resolves to the stored record instead of free text
+        record = _resolve_bug_record(bug_description)
+        if record and record.is_done('github_scan'):
+            return _cached_scan_summary(record)
+        if record:
+            bug_description = f"{record.summary}\n{record.description}"
         # Handle different input types
-        if isinstance(bug_description, dict):
+        elif isinstance(bug_description, dict):
             bug_description = str(bug_description)
         elif not bug_description or bug_description == "None":
             bug_description = "General bug analysis"
@@ -103,52 +274,27 @@ def analyze_entire_codebase(bug_description: Union[str, dict, Any]) -> str:
             bug_description = str(bug_description)
             
         github = Github(os.getenv('GITHUB_TOKEN'))
-        repo = github.get_repo(os.getenv('GITHUB_REPO'))
+        # Results are lazy PyGithub objects, so limits come from the client's last response headers
+        github_limit = lambda: (github.rate_limiting[0], github.rate_limiting_resettime)
+        repo = scheduler.call('github', github.get_repo, os.getenv('GITHUB_REPO'), rate_limit=github_limit)
         
-        result = f"Repository Analysis: {repo.full_name}\n"
-        result += f"Language: {repo.language}\n"
-        result += f"Last Updated: {repo.updated_at}\n\n"
+        lines = [
+            f"Repository Analysis: {repo.full_name}",
+            f"Language: {repo.language}",
+            f"Last Updated: {repo.updated_at}",
+            ""
+        ]
         
         # Get recent commits
-        commits = list(repo.get_commits()[:5])
-        result += "Recent Commits:\n"
-        for commit in commits:
-            result += f"- {commit.sha[:8]}: {commit.commit.message[:50]}...\n"
-        
-        # Extract keywords intelligently from bug description
-        import re
-        bug_lower = bug_description.lower()
-        
-        # Extract technical terms, error messages, and relevant keywords
-        bug_keywords = []
-        
-        # Extract quoted error messages
-        error_matches = re.findall(r'"([^"]+)"', bug_description)
-        error_matches.extend(re.findall(r"'([^']+)'", bug_description))
-        bug_keywords.extend([match.lower() for match in error_matches if len(match) > 2])
-        
-        # Extract technical terms (words that might be function names, libraries, etc.)
-        tech_words = re.findall(r'\b[A-Z][a-zA-Z]*\b|\b[a-z]+[A-Z][a-zA-Z]*\b', bug_description)
-        bug_keywords.extend([word.lower() for word in tech_words])
-        
-        # Extract common technical keywords from description
-        common_terms = ['error', 'undefined', 'null', 'function', 'script', 'widget', 'button', 'click', 'load', 'init']
-        for term in common_terms:
-            if term in bug_lower:
-                bug_keywords.append(term)
-        
-        # Extract words from the bug description (filter out common words)
-        stop_words = {'the', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those'}
-        words = re.findall(r'\b[a-zA-Z]{3,}\b', bug_lower)
-        meaningful_words = [word for word in words if word not in stop_words and len(word) > 2]
-        bug_keywords.extend(meaningful_words[:10])  # Limit to top 10 meaningful words
-        
-        # Remove duplicates and empty strings
-        bug_keywords = list(set([kw for kw in bug_keywords if kw and len(kw) > 1]))
+        commits = scheduler.call('github', lambda: list(repo.get_commits()[:5]), rate_limit=github_limit)
+        lines.append("Recent Commits:")
+        lines.extend(f"- {commit.sha[:8]}: {commit.commit.message[:50]}..." for commit in commits)
+        
+        bug_keywords = _extract_bug_keywords(bug_description)
         
         # Look for relevant files and analyze their content
-        contents = repo.get_contents("")
-        result += "\nCode Analysis Results:\n"
+        contents = scheduler.call('github', repo.get_contents, "", rate_limit=github_limit)
+        lines.append("\nCode Analysis Results:")
         
         analyzed_files = 0
         relevant_files = []
@@ -160,7 +306,7 @@ def analyze_entire_codebase(bug_description: Union[str, dict, Any]) -> str:
             if item.type == "file" and item.name.endswith(('.js', '.jsx', '.html', '.css', '.php', '.py')):
                 try:
                     # Get file content
-                    file_content = repo.get_contents(item.path)
+                    file_content = scheduler.call('github', repo.get_contents, item.path, rate_limit=github_limit)
                     if file_content.size < 50000:  # Only analyze files smaller than 50KB
                         content = file_content.decoded_content.decode('utf-8')
                         
@@ -182,33 +328,140 @@ def analyze_entire_codebase(bug_description: Union[str, dict, Any]) -> str:
                             
                         analyzed_files += 1
                         
+                except QuotaExhaustedError:
+                    raise
                 except Exception as e:
                     continue
         
         # Report findings
         if relevant_files:
-            result += f"\nFound {len(relevant_files)} potentially relevant files:\n"
+            lines.append(f"\nFound {len(relevant_files)} potentially relevant files:")
             for file_info in relevant_files:
-                result += f"\n📁 {file_info['name']} ({file_info['size']} bytes)\n"
+                lines.append(f"\n📁 {file_info['name']} ({file_info['size']} bytes)")
                 if file_info['keywords']:
-                    result += f"   Keywords found: {', '.join(file_info['keywords'])}\n"
-                result += f"   Code preview:\n   {file_info['content_preview'][:200]}...\n"
+                    lines.append(f"   Keywords found: {', '.join(file_info['keywords'])}")
+                lines.append(f"   Code preview:\n   {file_info['content_preview'][:200]}...")
         else:
-            result += "\nNo directly relevant files found based on bug keywords.\n"
+            lines.append("\nNo directly relevant files found based on bug keywords.")
+        
+        if record:
+            update_record('enriched', record.key, step='github_scan',
+                          matched_files=_merge_unique(record.matched_files, [f['name'] for f in relevant_files]))
         
         # Add general repository structure
-        result += f"\nRepository Structure (analyzed {analyzed_files} files):\n"
+        lines.append(f"\nRepository Structure (analyzed {analyzed_files} files):")
         for item in contents[:15]:
             if item.type == "file":
-                result += f"- {item.name} ({item.size} bytes)\n"
+                lines.append(f"- {item.name} ({item.size} bytes)")
             elif item.type == "dir":
-                result += f"- {item.name}/ (directory)\n"
+                lines.append(f"- {item.name}/ (directory)")
         
-        return result
+        return "\n".join(lines) + "\n"
         
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"GitHub analysis completed with limited data due to: {str(e)}"
 
+@tool
+def analyze_local_codebase(bug_description: Union[str, dict, Any]) -> str:
+    """Scan a local repository checkout (LOCAL_REPO_PATH) for bug-related code, including large files"""
+    try:
+        # A bare issue key resolves to the stored record instead of free text
+        record = _resolve_bug_record(bug_description)
+        if record and record.is_done('local_scan'):
+            return _cached_scan_summary(record)
+        if record:
+            bug_description = f"{record.summary}\n{record.description}"
+        # Handle different input types
+        elif isinstance(bug_description, dict):
+            bug_description = str(bug_description)
+        elif not bug_description or bug_description == "None":
+            bug_description = "General bug analysis"
+        else:
+            bug_description = str(bug_description)
+        
+        repo_path = os.getenv('LOCAL_REPO_PATH')
+        if not repo_path or not os.path.isdir(repo_path):
+            return "Local codebase scan skipped: LOCAL_REPO_PATH is not set to a directory"
+        
+        bug_keywords = _extract_bug_keywords(bug_description)
+        if not bug_keywords:
+            return "Local codebase scan skipped: no searchable keywords in bug description"
+        
+        # Longest keywords first so the alternation prefers the most specific match
+        pattern = re.compile(
+            b'|'.join(re.escape(kw.encode('utf-8')) for kw in sorted(bug_keywords, key=len, reverse=True)),
+            re.IGNORECASE
+        )
+        
+        scanned_files = 0
+        skipped_files = 0
+        unreadable_files = 0
+        matching_files = 0
+        # Min-heap of (distinct keyword count, path, matches): keeps only the MAX_LOCAL_FILES best files
+        top_files = []
+        
+        for root, dirs, files in os.walk(repo_path):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+            for name in files:
+                if not name.endswith(SOURCE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    result = _scan_file_for_keywords(path, pattern)
+                except (OSError, ValueError):
+                    unreadable_files += 1
+                    continue
+                if result is None:
+                    skipped_files += 1
+                    continue
+                scanned_files += 1
+                matches, keywords = result
+                if not matches:
+                    continue
+                
+                matching_files += 1
+                entry = (len(keywords), path, matches, sorted(keywords))
+                if len(top_files) < MAX_LOCAL_FILES:
+                    heapq.heappush(top_files, entry[:2] + (entry,))
+                elif entry[:2] > top_files[0][:2]:
+                    heapq.heapreplace(top_files, entry[:2] + (entry,))
+        
+        # Most distinct keywords first
+        ranked = [item[2] for item in sorted(top_files, reverse=True)]
+        matched_files = []
+        hits = []
+        lines = [f"Local Codebase Analysis: {repo_path}", "", "Code Analysis Results:"]
+        for _, path, matches, keywords in ranked:
+            rel_path = os.path.relpath(path, repo_path)
+            matched_files.append(rel_path)
+            hits.extend(f"{rel_path}:{m['line']} ({m['keyword']})" for m in matches)
+            lines.append(f"\n📁 {rel_path} ({os.path.getsize(path)} bytes)")
+            lines.append(f"   Keywords found: {', '.join(keywords)}")
+            for m in matches:
+                lines.append(f"   Line {m['line']}:")
+                lines.extend(f"      {context_line}" for context_line in m['context'])
+        
+        if not ranked:
+            lines.append("\nNo directly relevant files found based on bug keywords.")
+        elif matching_files > len(ranked):
+            lines.append(f"\nShowing the {len(ranked)} files with the most distinct keywords out of {matching_files} matching files")
+        lines.append(f"\nScanned {scanned_files} files ({skipped_files} empty or binary skipped, {unreadable_files} unreadable)")
+        
+        if record:
+            update_record(
+                'enriched', record.key, step='local_scan',
+                matched_files=_merge_unique(record.matched_files, matched_files),
+                context="; ".join(hits[:10])
+            )
+        return "\n".join(lines) + "\n"
+        
+    except QuotaExhaustedError:
+        raise
+    except Exception as e:
+        return f"Local codebase analysis completed with limited data due to: {str(e)}"
+
 @tool
 def analyze_bug_with_gemini(bug_context: Union[str, dict, Any]) -> str:
     """Analyze bug context using Gemini AI and provide summary"""
@@ -224,14 +477,23 @@ def analyze_bug_with_gemini(bug_context: Union[str, dict, Any]) -> str:
         if not context_str or context_str == "None":
             return "No bug context provided for analysis"
         
-        context_str = context_str[:1500]  # Limit context size
+        record = _resolve_bug_record(context_str)
+        if record and record.is_done('analysis'):
+            return record.analysis
+        if record:
+            context_str = record.prompt_context()
         
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        context_str = context_str[:1500]  # Limit context size
         
-        prompt = f"Analyze this software bug and provide a brief technical summary:\n\n{context_str[:500]}"
-        response = model.generate_content(prompt)
-        return response.text
+        prompt = f"Analyze this software bug and provide a brief technical summary:\n\n{context_str}"
+        if record:
+            # Route by complexity: templates/small model for trivial bugs, heavy model for hard ones
+            text = generate_for_bug(record, prompt, 'analysis')
+            update_record('analyzed', record.key, step='analysis', analysis=text, complexity=complexity_score(record), tier=route(record))
+            return text
+        return generate(prompt)
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"**AI Analysis (Fallback):**\n\nUnable to analyze the bug context due to: {str(e)}. Please review the bug details manually."
 
@@ -250,14 +512,23 @@ def generate_bug_solution(bug_context: Union[str, dict, Any]) -> str:
         if not context_str or context_str == "None":
             return "No bug context provided for solution generation"
         
-        context_str = context_str[:1500]  # Limit context size
+        record = _resolve_bug_record(context_str)
+        if record and record.is_done('solution'):
+            return record.solution
+        if record:
+            context_str = record.prompt_context()
         
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        context_str = context_str[:1500]  # Limit context size
         
-        prompt = f"Provide step-by-step technical solution to fix this software bug:\n\n{context_str[:500]}"
-        response = model.generate_content(prompt)
-        return response.text
+        prompt = f"Provide step-by-step technical solution to fix this software bug:\n\n{context_str}"
+        if record:
+            # Route by complexity: templates/small model for trivial bugs, heavy model for hard ones
+            text = generate_for_bug(record, prompt, 'solution')
+            update_record('analyzed', record.key, step='solution', solution=text, complexity=complexity_score(record), tier=route(record))
+            return text
+        return generate(prompt)
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"**Technical Solution (Fallback):**\n\nUnable to generate specific solution due to: {str(e)}. Please analyze the bug manually and implement appropriate fixes."
 
@@ -265,6 +536,20 @@ def generate_bug_solution(bug_context: Union[str, dict, Any]) -> str:
 def generate_comprehensive_report(analysis_data: Union[str, dict, Any]) -> str:
     """Generate comprehensive bug resolution handbook using AI"""
     try:
+        records = [r for r in load_latest_records().values() if r.analysis or r.solution]
+        
+        # Per-bug records: map-reduce every bug into a handbook streamed to disk
+        if records:
+            summary = generate_report(records)
+            return f"""# 📋 COMPREHENSIVE BUG RESOLUTION HANDBOOK
+**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | **Bugs covered:** {len(records)}
+
+## Executive Summary
+
+{summary}
+
+Full per-bug resolution sections: `{REPORT_FILE}`"""
+        
         # Handle different input types
         if isinstance(analysis_data, dict):
             context_str = str(analysis_data)
@@ -273,10 +558,8 @@ def generate_comprehensive_report(analysis_data: Union[str, dict, Any]) -> str:
         else:
             context_str = str(analysis_data)
         
-        context_str = context_str[:2000]  # Limit context size
-        
-        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        # Reduce long free text instead of truncating it
+        context_str = summarize_text(context_str)
         
         prompt = f"""Create a comprehensive bug resolution handbook based on this analysis data:
 
@@ -296,16 +579,18 @@ Generate a detailed report with these sections:
 
 Format with proper headings and bullet points. Include specific technical details and actionable steps."""
         
-        response = model.generate_content(prompt)
+        report_text = generate(prompt)
         
         # Add header with timestamp
         report = f"""# 📋 COMPREHENSIVE BUG RESOLUTION HANDBOOK
 **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
-{response.text}"""
+{report_text}"""
         
         return report
         
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"""# 📋 COMPREHENSIVE BUG RESOLUTION HANDBOOK
 **Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
@@ -332,7 +617,8 @@ def add_jira_comment(issue_key: str, comment: str) -> str:
             }
         }
         
-        response = requests.post(
+        response = scheduler.call(
+            'jira', requests.post,
             f"{base_url}/rest/api/3/issue/{issue_key}/comment",
             json=data,
             auth=auth
@@ -342,5 +628,7 @@ def add_jira_comment(issue_key: str, comment: str) -> str:
             return f"AI analysis comment added to {issue_key}"
         else:
             return f"Failed to add comment: {response.status_code} - {response.text}"
+    except QuotaExhaustedError:
+        raise
     except Exception as e:
         return f"Error adding comment: {str(e)}"
\ No newline at end of file
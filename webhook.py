@@ -0,0 +1,270 @@
+import os
+import sys
+import hmac
+import json
+import time
+import queue
+import hashlib
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional
+from records import BugRecord, record_from_jira_issue, get_record, reset_record, records_dir_scope
+from scheduler import priority_scope, PRIORITY_BACKGROUND
+
+HANDLED_EVENTS = {'jira:issue_created', 'jira:issue_updated'}
+DEBOUNCE_SECONDS = float(os.getenv('WEBHOOK_DEBOUNCE_SECONDS', '3'))
+MAX_DEBOUNCE_SECONDS = float(os.getenv('WEBHOOK_MAX_DEBOUNCE_SECONDS', '30'))
+WORKER_COUNT = int(os.getenv('WEBHOOK_WORKERS', '2'))
+# Kept apart from runs/ so crew runs (set_records_dir, get_jira_bugs' reset) never touch it
+WEBHOOK_RECORDS_DIR = os.getenv('WEBHOOK_RECORDS_DIR', 'webhook_records')
+
+def parse_jira_event(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the issue from a Jira issue-created/updated webhook for a Bug, else None"""
+    if payload.get('webhookEvent') not in HANDLED_EVENTS:
+        return None
+    issue = payload.get('issue') or {}
+    issue_type = ((issue.get('fields') or {}).get('issuetype') or {}).get('name')
+    if not issue.get('key') or issue_type != 'Bug':
+        return None
+    return issue
+
+def verify_signature(body: bytes, signature: Optional[str], secret: Optional[str]) -> bool:
+    """Check Jira's 'X-Hub-Signature: sha256=<hex>' header when a webhook secret is configured"""
+    if not secret:
+        return True
+    if not signature or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len('sha256='):])
+
+def run_bug_pipeline(issue: Dict[str, Any]) -> BugRecord:
+    """Enrich and analyze a single bug straight from its webhook payload, without a full crew run.
+
+    Records are read and written in WEBHOOK_RECORDS_DIR regardless of the current run directory.
+    """
+    # Imported here so the receiver itself does not need the CrewAI stack
+    from tools import (
+        get_linked_jira_issues, analyze_entire_codebase,
+        analyze_local_codebase, analyze_bug_with_gemini, generate_bug_solution
+    )
+    key = issue['key']
+    with records_dir_scope(WEBHOOK_RECORDS_DIR):
+        reset_record(record_from_jira_issue(issue))
+        get_linked_jira_issues.run(key)
+        if os.getenv('LOCAL_REPO_PATH'):
+            analyze_local_codebase.run(key)
+        else:
+            analyze_entire_codebase.run(key)
+        analyze_bug_with_gemini.run(key)
+        generate_bug_solution.run(key)
+        return get_record(key)
+
+class KeyDebouncer:
+    """Coalesce bursts of edits per issue key.
+
+    A key is released once it has been quiet for `delay` seconds, or `max_delay` seconds after
+    its first event if edits keep arriving. Only the latest payload for a key is kept.
+    """
+
+    def __init__(self, delay: float = DEBOUNCE_SECONDS, max_delay: float = MAX_DEBOUNCE_SECONDS):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._pending = {}
+        self._cond = threading.Condition()
+
+    def add(self, key: str, issue: Dict[str, Any]):
+        now = time.monotonic()
+        with self._cond:
+            first_seen = self._pending[key][1] if key in self._pending else now
+            self._pending[key] = (min(now + self.delay, first_seen + self.max_delay), first_seen, issue)
+            self._cond.notify()
+
+    def pop_due(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Block until at least one key is due (or timeout), then return the due issues"""
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = [key for key, (deadline, _, _) in self._pending.items() if deadline <= now]
+                if due:
+                    return [self._pending.pop(key)[2] for key in due]
+                waits = [deadline - now for deadline, _, _ in self._pending.values()]
+                if end is not None:
+                    if now >= end:
+                        return []
+                    waits.append(end - now)
+                self._cond.wait(min(waits) if waits else None)
+
+    def pending_keys(self) -> List[str]:
+        with self._cond:
+            return list(self._pending)
+
+class WebhookListener:
+    """Local HTTP receiver that turns Jira webhooks into per-bug pipeline runs"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 8765, secret: Optional[str] = None,
+                 pipeline: Callable[[Dict[str, Any]], BugRecord] = run_bug_pipeline,
+                 debouncer: Optional[KeyDebouncer] = None, workers: int = WORKER_COUNT):
+        self.secret = secret
+        self.pipeline = pipeline
+        self.debouncer = debouncer or KeyDebouncer()
+        self.workers = workers
+        self._work = queue.Queue()
+        self._queued = {}
+        self._running = set()
+        self._queued_lock = threading.Lock()
+        self._listeners = []
+        self._listeners_lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _handler_class(self):
+        listener = self
+
+        class JiraWebhookHandler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                if not verify_signature(body, self.headers.get('X-Hub-Signature'), listener.secret):
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    self.send_response(400)
+                    self.end_headers()
+                    return
+                accepted = listener.submit(payload)
+                self.send_response(202 if accepted else 204)
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        return JiraWebhookHandler
+
+    def add_listener(self, callback: Callable[[BugRecord], None]):
+        with self._listeners_lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[BugRecord], None]):
+        with self._listeners_lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def submit(self, payload: Dict[str, Any]) -> bool:
+        """Debounce a webhook payload; returns False for events that are ignored"""
+        issue = parse_jira_event(payload)
+        if issue is None:
+            return False
+        self.debouncer.add(issue['key'], issue)
+        return True
+
+    def _dispatch_loop(self):
+        while True:
+            for issue in self.debouncer.pop_due():
+                with self._queued_lock:
+                    # A key already queued or running just gets its payload refreshed
+                    idle = issue['key'] not in self._queued and issue['key'] not in self._running
+                    self._queued[issue['key']] = issue
+                if idle:
+                    self._work.put(issue['key'])
+
+    def _worker_loop(self):
+        # Push-triggered work yields to interactive dashboard calls in the scheduler
+        with priority_scope(PRIORITY_BACKGROUND):
+            while True:
+                key = self._work.get()
+                with self._queued_lock:
+                    issue = self._queued.pop(key)
+                    self._running.add(key)
+                try:
+                    record = self.pipeline(issue)
+                except Exception as e:
+                    print(f"❌ Webhook pipeline failed for {key}: {str(e)}")
+                    record = None
+                finally:
+                    with self._queued_lock:
+                        self._running.discard(key)
+                        if key in self._queued:
+                            self._work.put(key)  # Edited again while running
+                if record is None:
+                    continue
+                with self._listeners_lock:
+                    callbacks = list(self._listeners)
+                for callback in callbacks:
+                    try:
+                        callback(record)
+                    except Exception as e:
+                        print(f"⚠️ Webhook listener callback failed: {str(e)}")
+
+    def start(self) -> "WebhookListener":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        threading.Thread(target=self._dispatch_loop, daemon=True).start()
+        for _ in range(self.workers):
+            threading.Thread(target=self._worker_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+_listener = None
+_listener_lock = threading.Lock()
+
+def get_listener() -> Optional[WebhookListener]:
+    """Process-wide listener, started on first use when JIRA_WEBHOOK_PORT is set"""
+    global _listener
+    port = os.getenv('JIRA_WEBHOOK_PORT')
+    if not port:
+        return None
+    with _listener_lock:
+        if _listener is None:
+            _listener = WebhookListener(
+                host=os.getenv('JIRA_WEBHOOK_HOST', '127.0.0.1'),
+                port=int(port),
+                secret=os.getenv('JIRA_WEBHOOK_SECRET')
+            ).start()
+        return _listener
+
+def replay_events(url: str, events: List[Dict[str, Any]], interval: float = 0.0,
+                  secret: Optional[str] = None) -> List[int]:
+    """Replay recorded Jira webhook payloads against a listener; returns the response codes"""
+    codes = []
+    for event in events:
+        body = json.dumps(event).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if secret:
+            headers['X-Hub-Signature'] = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        request = urllib.request.Request(url, data=body, headers=headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                codes.append(response.status)
+        except urllib.error.HTTPError as e:
+            codes.append(e.code)
+        if interval:
+            time.sleep(interval)
+    return codes
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    if len(sys.argv) >= 3 and sys.argv[1] == 'replay':
+        # python webhook.py replay events.jsonl [url]
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            recorded = [json.loads(line) for line in f if line.strip()]
+        target = sys.argv[3] if len(sys.argv) > 3 else f"http://127.0.0.1:{os.getenv('JIRA_WEBHOOK_PORT', '8765')}/"
+        print(replay_events(target, recorded, secret=os.getenv('JIRA_WEBHOOK_SECRET')))
+    else:
+        os.environ.setdefault('JIRA_WEBHOOK_PORT', '8765')
+        listener = get_listener()
+        listener.add_listener(lambda record: print(f"✅ {record.key} analyzed ({record.tier or 'n/a'})"))
+        print(f"Listening for Jira webhooks on {listener.url}")
+        threading.Event().wait()